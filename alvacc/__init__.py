@@ -1,4 +1,21 @@
 """ Wrapper to include the main library modules """
-from .locations import Availability, sort_avail, Location, get_locations
+from .locations import (
+    Availability,
+    AvailabilitySnapshot,
+    sort_avail,
+    Location,
+    get_locations,
+)
+from .output import NDJSONWriter
+from .query import check_many, ResponseCache
 
-__all__ = ["Availability", "sort_avail", "Location", "get_locations"]
+__all__ = [
+    "Availability",
+    "AvailabilitySnapshot",
+    "sort_avail",
+    "Location",
+    "get_locations",
+    "NDJSONWriter",
+    "check_many",
+    "ResponseCache",
+]
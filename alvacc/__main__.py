@@ -2,13 +2,20 @@
 
 import os
 import sys
-from datetime import datetime
-import time
+import signal
 import argparse
 import webbrowser
 
-from .locations import Availability, sort_avail, next_avail, get_locations
+from .locations import get_locations, Location, ResultPending, current_version
 from .config import config
+from .shard import ShardedPoller
+from .cache import SharedCache
+from .output import formats
+from .schedule import ReleaseWindows
+from .server import SnapshotServer
+from .catalog import Catalog, catalog_url
+from .state import StateFile
+from . import stats, dates, profiling, locations
 
 
 def parse_args():
@@ -52,6 +59,119 @@ def parse_args():
         dest="reset_config",
         help="reset and recreate config file",
     )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        action="store",
+        dest="workers",
+        type=int,
+        help="number of worker processes to spread location queries across",
+        default=1,
+    )
+    parser.add_argument(
+        "--shared_cache",
+        action="store",
+        dest="shared_cache",
+        help="path to a cache database shared with other alvacc processes on this machine",
+        default=None,
+    )
+    parser.add_argument(
+        "--cache_ttl",
+        action="store",
+        dest="cache_ttl",
+        type=int,
+        help="age (seconds) at which shared cache results are refetched, defaults to sleep time",
+        default=None,
+    )
+    parser.add_argument(
+        "--format",
+        action="store",
+        dest="format",
+        choices=sorted(formats),
+        help="output format, ndjson streams one JSON record per observation",
+        default="terminal",
+    )
+    parser.add_argument(
+        "--learn_windows",
+        action="store_true",
+        dest="learn_windows",
+        help="learn when locations release slots and poll at the burst rate around then "
+        "(with --workers, workers still query at the sleep time)",
+    )
+    parser.add_argument(
+        "--burst_sleep",
+        action="store",
+        dest="burst_sleep",
+        type=int,
+        help="time to sleep between queries inside a learned release window (seconds)",
+        default=30,
+    )
+    parser.add_argument(
+        "--history",
+        action="store",
+        dest="history",
+        help="ndjson output log to learn release windows from at startup",
+        default=None,
+    )
+    parser.add_argument(
+        "--serve",
+        action="store",
+        dest="serve",
+        type=int,
+        help="port to serve the current availability on over http",
+        default=None,
+    )
+    parser.add_argument(
+        "--serve_host",
+        action="store",
+        dest="serve_host",
+        help="address to serve on, defaults to localhost only",
+        default="127.0.0.1",
+    )
+    parser.add_argument(
+        "--refresh_locations",
+        action="store",
+        dest="refresh_locations",
+        nargs="?",
+        const=catalog_url,
+        help="refresh the location list in the background from this url (or the "
+        "website's), used from the next start",
+        default=None,
+    )
+    parser.add_argument(
+        "--profile",
+        action="store",
+        dest="profile",
+        type=int,
+        help="run this many cycles without sleeping under cProfile and tracemalloc, then exit",
+        default=None,
+    )
+    parser.add_argument(
+        "--profile_output",
+        action="store",
+        dest="profile_output",
+        help="path prefix for the profile results",
+        default="alvacc-profile",
+    )
+    parser.add_argument(
+        "--stand_in",
+        action="store_true",
+        dest="stand_in",
+        help="answer queries from a local stand-in server instead of the website",
+    )
+    parser.add_argument(
+        "--state_file",
+        action="store",
+        dest="state_file",
+        help="file to save the last known availability in, to resume from on restart",
+        default=None,
+    )
+    parser.add_argument(
+        "--no_state",
+        action="store_true",
+        dest="no_state",
+        help="start fresh and don't save availability",
+    )
     parser.add_argument(
         "-c",
         "--cfg",
@@ -62,54 +182,168 @@ def parse_args():
     return parser.parse_args()
 
 
-def bold(text, should_bold=True):
-    """add term codes to make bold and escape
-
-    Args:
-        text: text to be printed as bold
-        should_bold: bool to return bold or original
-    """
-    return f"\033[1m{text}\033[0m" if should_bold else text
-
-
 def main():
+    if sys.argv[1:2] == ["stats"]:
+        return stats.main(sys.argv[2:])
     args = parse_args()
+    # fetched location lists are opt in, otherwise the bundled list is used
+    if args.refresh_locations:
+        Catalog(args.refresh_locations).load().refresh_in_background()
     args.current_appointment_date = " ".join(args.current_appointment_date)
+    if args.profile and args.workers > 1:
+        # workers would be invisible to cProfile
+        print("--profile can't be used with --workers", file=sys.stderr)
+        return 2
     cfg = config(**vars(args))
-    max_name_len = max([len(loc.name) for loc in cfg.locations])
-    while True:
-        new_availability = False
+    # poll loop sleep, caches and intervals keep the configured time
+    sleep_time = int(args.sleep_time)
+    if args.profile:
+        # measure the work, not the sleeping
+        args.sleep_time = 0
+        args.learn_windows = False
+    stand_in = None
+    if args.stand_in:
+        stand_in = profiling.StandIn().start()
+        locations.base_url = stand_in.url
+    outputs = [formats[args.format](cfg.locations)]
+    state = None
+    due = None
+    # stand-in replies are made up, keep them out of the saved state
+    if not (args.no_state or args.profile or args.stand_in):
+        state = StateFile(
+            args.state_file,
+            interval=max(sleep_time, 60),
+            config_file=cfg.config_file,
+        )
+        due = state.restore(cfg.locations)
+        outputs.append(state)
+    server = None
+    if args.serve:
+        server = SnapshotServer(args.serve_host, args.serve).start()
+        outputs.append(server)
+    windows = None
+    if args.learn_windows:
+        windows = ReleaseWindows(burst=args.burst_sleep, sparse=sleep_time)
+        if args.history and os.path.exists(args.history):
+            windows.load(args.history)
+    poller = None
+    check = Location.check_next_available
+    if args.shared_cache:
+        check = SharedCache(
+            args.shared_cache, ttl=args.cache_ttl or sleep_time
+        ).check
+    if args.workers > 1:
+        poller = ShardedPoller(
+            cfg.locations, args.workers, sleep_time, check=check
+        )
+        # restored locations wait for their next check in the workers too
+        for loc in cfg.locations:
+            if due and loc.location_id in due:
+                poller.defer(loc, due[loc.location_id])
+        poller.start()
+        check = poller.check
+    # stop on SIGTERM (kill, systemd) the same way as ctrl-c, so state is saved
+    signal.signal(signal.SIGTERM, _interrupt)
+    try:
+        if args.profile:
+            paths = profiling.run(
+                lambda: poll(args, cfg, check, poller, outputs, cycles=args.profile),
+                args.profile_output,
+            )
+            print("\nProfile written to " + ", ".join(paths), file=sys.stderr)
+            return 0
+        return poll(args, cfg, check, poller, outputs, windows, due=due)
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        if state:
+            state.save(cfg.locations)
+        if poller:
+            poller.close()
+        if server:
+            server.close()
+        if stand_in:
+            stand_in.close()
+
+
+def _interrupt(signum, frame):
+    # systemd signals every process in the group, ignore repeats while shutting down
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    raise KeyboardInterrupt
+
+
+def poll(args, cfg, check, poller, outputs, windows=None, cycles=None, due=None):
+    # time each location is next due to be checked, by id
+    due = {} if due is None else due
+    cycle = 0
+    while cycles is None or cycle < cycles:
+        cycle += 1
+        if poller:
+            poller.supervise()
+        cycle_version = current_version()
+        health_changed = False
         # check each location for new availability
         for loc in cfg.locations:
-            # getting previous availability clears bold by reprinting
-            new_availability |= loc.availability.is_new
+            checked = dates.now()
+            if due.get(loc.location_id, 0) > checked:
+                continue
+            # skip locations that keep failing until their next probe
+            if not loc.health.allow(checked):
+                due[loc.location_id] = loc.health.retry_at
+                continue
+            due[loc.location_id] = checked + (
+                windows.interval(loc.location_id, checked)
+                if windows
+                else int(args.sleep_time)
+            )
+            previous = loc.availability.snapshot
             try:
-                loc.availability.current = loc.check_next_available()
-                new_availability |= loc.availability.is_new
-            except OSError:
+                na = check(loc)
+                if not na.parsed:
+                    raise ValueError(f"Unable to parse response {na.text!r}")
+                # rechecking an unchanged location clears is_new, which
+                # publishes a new version so the bold gets cleared by reprinting
+                loc.availability.current = na
+            except ResultPending:
+                # another worker or process is querying it, not a failure
                 continue
+            except (OSError, ValueError) as e:
+                opened = loc.health.failure(checked, parse=isinstance(e, ValueError))
+                if poller and opened:
+                    # stop the worker querying it too
+                    poller.defer(loc, loc.health.retry_at)
+                health_changed |= opened
+                for output in outputs:
+                    output.error(loc, checked, e)
+                continue
+            health_changed |= loc.health.success(checked)
+            snapshot = loc.availability.snapshot
+            is_new = snapshot.is_new and snapshot.version > previous.version
             appt_avail = bool(
-                loc.availability.current.date < cfg.current_appointment_date
-                if loc.availability.is_new and loc.availability.current.date
+                snapshot.current.date < cfg.current_appointment_date
+                if is_new and snapshot.current.date
                 else False
             )
-            if appt_avail:
-                print(f"--- New Appointment Available! ---")
+            if windows and previous.current and is_new:
+                windows.record(loc.location_id, checked)
+            for output in outputs:
+                output.observe(loc, checked, appt_avail)
+            # stand-in replies are made up, don't act on them
+            if appt_avail and not args.stand_in:
                 # open browser to vaccine edit page
                 webbrowser.open(cfg.confirmation_url)
-        # print results
-        current_time = datetime.now().strftime("%H:%M:%S")
-        if new_availability:
-            os.system("cls" if os.name == "nt" else "clear")
-            print(current_time)
-            # print all, bolding changes
-            print_strings = [
-                f"  {name:{max_name_len}} - {bold(str(avail), avail.is_new)}"
-                for name, avail in sort_avail(cfg.locations).items()
-            ]
-            print("\n".join(print_strings))
-        print("Last checked at " + str(current_time), end="\r")
-        time.sleep(int(args.sleep_time))
+        # always draw the first cycle, restored state isn't new
+        new_availability = cycle == 1 or any(
+            loc.availability.changed_since(cycle_version) for loc in cfg.locations
+        )
+        for output in outputs:
+            output.cycle(
+                cfg.locations, dates.now(), new_availability or health_changed
+            )
+        if windows:
+            dates.sleep(max(0, min(due.values()) - dates.now()))
+        else:
+            dates.sleep(int(args.sleep_time))
     return 0
 
 
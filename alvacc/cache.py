@@ -0,0 +1,117 @@
+import os
+import time
+import sqlite3
+from datetime import datetime
+
+from .locations import Location, next_avail, ResultPending
+
+
+class SharedCache:
+    """Machine-local response cache shared between alvacc processes
+
+    Results are stored in a small SQLite database. The first process to find a
+    location's entry stale claims a lease on it and queries the site, while the
+    others keep using the stored result until the new one lands.
+
+    Args:
+        path: path to the SQLite database, created if missing
+        ttl: age (seconds) at which a stored result is refetched
+        lease: time (seconds) a claim is honored before another process may take over
+        fetch: function called with a Location to query the site
+    """
+
+    def __init__(self, path, ttl=300, lease=30, fetch=Location.check_next_available):
+        self.path = path
+        self.ttl = ttl
+        self.lease = lease
+        self.fetch = fetch
+        self._owner = None
+        self._db = None
+
+    def __getstate__(self):
+        # connections can't be shared across processes, reconnect on first use
+        state = self.__dict__.copy()
+        state["_db"] = state["_owner"] = None
+        return state
+
+    @property
+    def db(self):
+        if self._db is None:
+            self._owner = f"{os.getpid()}:{id(self)}"
+            self._db = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "location_id INTEGER PRIMARY KEY, text TEXT, date INTEGER, "
+                "num_available INTEGER, fetched REAL, owner TEXT, lease_expires REAL)"
+            )
+        return self._db
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _claim(self, location_id, now):
+        """return the stored row, and whether this process now holds the lease"""
+        db = self.db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute(
+                "SELECT text, date, num_available, fetched, owner, lease_expires "
+                "FROM responses WHERE location_id = ?",
+                (location_id,),
+            ).fetchone()
+            if row and row[3] and now - row[3] < self.ttl:
+                return row, False
+            if row and row[4] and row[4] != self._owner and row[5] > now:
+                return row, False
+            db.execute(
+                "INSERT INTO responses (location_id, owner, lease_expires) VALUES (?, ?, ?) "
+                "ON CONFLICT(location_id) DO UPDATE SET "
+                "owner = excluded.owner, lease_expires = excluded.lease_expires",
+                (location_id, self._owner, now + self.lease),
+            )
+            return row, True
+        finally:
+            db.execute("COMMIT")
+
+    def check(self, loc):
+        """next availability for a location, querying only if no fresh result is shared
+
+        Raises:
+            ResultPending: if no result has been stored yet and another
+                process holds the lease
+            OSError: if this process held the lease and the query failed
+        """
+        row, leased = self._claim(loc.location_id, time.time())
+        if not leased:
+            if not row or row[3] is None:
+                raise ResultPending(
+                    f"Waiting on another process to query {loc.name}"
+                )
+            return next_avail.from_fields(
+                row[0], datetime.fromordinal(row[1]) if row[1] else None, row[2]
+            )
+        try:
+            na = self.fetch(loc)
+        except OSError:
+            # release so another process can try
+            self.db.execute(
+                "UPDATE responses SET owner = NULL, lease_expires = NULL "
+                "WHERE location_id = ? AND owner = ?",
+                (loc.location_id, self._owner),
+            )
+            raise
+        self.db.execute(
+            "UPDATE responses SET text = ?, date = ?, num_available = ?, fetched = ?, "
+            "owner = NULL, lease_expires = NULL WHERE location_id = ?",
+            (
+                na.text,
+                na.date.toordinal() if na.date else None,
+                na.num_available,
+                time.time(),
+                loc.location_id,
+            ),
+        )
+        return na
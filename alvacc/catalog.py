@@ -0,0 +1,155 @@
+import os
+import sys
+import json
+import threading
+import urllib.request
+from urllib.error import HTTPError
+
+from . import dates
+from . import locations
+from .locations import Location
+
+catalog_url = "https://al-telegov.egov.com/alabamavaccine/CustomerCreateAppointments/GetLocations"
+
+_fields = ("name", "full_name", "city", "zip_code", "location_id")
+
+
+class Catalog:
+    """List of locations from the website, cached on disk
+
+    The locations defined in locations.py are used unless a fetched list is
+    loaded. Cached entries update matching locations and add any new ones
+    when loaded at startup. Background refreshes only update the cache, since
+    pollers, state and schedules are keyed by location id, so a fetched list
+    takes effect on the next start.
+
+    Args:
+        url: endpoint returning a JSON list of locations with the Location fields
+        cache_path: file to keep the fetched list in
+        ttl: age (seconds) at which the list is refetched
+    """
+
+    def __init__(self, url=catalog_url, cache_path=None, ttl=86400):
+        self.url = url
+        self.cache_path = cache_path or os.path.join(
+            os.path.expanduser("~"), ".cache", "alvacc", "locations.json"
+        )
+        self.ttl = ttl
+        self.fetched = None
+        self.etag = None
+        self._thread = None
+
+    @property
+    def stale(self):
+        return self.fetched is None or dates.now() - self.fetched >= self.ttl
+
+    def load(self):
+        """apply the cached list if there is one"""
+        try:
+            with open(self.cache_path) as f:
+                cached = json.load(f)
+            self.fetched = cached["fetched"]
+            self.etag = cached.get("etag")
+            self.apply(cached["locations"])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            if not isinstance(e, FileNotFoundError):
+                print(
+                    f"Ignoring unreadable location cache {self.cache_path}: {e!r}",
+                    file=sys.stderr,
+                )
+        return self
+
+    def refresh(self, apply=True):
+        """fetch the list if it has changed, returning names of changed locations
+
+        Args:
+            apply: whether to update locations now, or only the cache
+        """
+        request = urllib.request.Request(self.url)
+        if self.etag:
+            request.add_header("If-None-Match", self.etag)
+        try:
+            with urllib.request.urlopen(request, timeout=30) as f:
+                entries = json.loads(f.read().decode("utf-8"))
+                etag = f.headers.get("ETag")
+        except HTTPError as e:
+            if e.code != 304:
+                raise
+            # unchanged since last fetch
+            self.fetched = dates.now()
+            self._save(self._cached_entries())
+            return []
+        entries = self.validate(entries)
+        changed = self.apply(entries) if apply else []
+        self.fetched = dates.now()
+        self.etag = etag
+        self._save(entries)
+        return changed
+
+    def refresh_in_background(self):
+        """refresh the cache on a daemon thread if the list is stale, without raising"""
+        if not self.stale or (self._thread and self._thread.is_alive()):
+            return self._thread
+
+        def run():
+            try:
+                self.refresh(apply=False)
+            except (OSError, ValueError) as e:
+                print(f"Unable to refresh location list: {e!r}", file=sys.stderr)
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def _cached_entries(self):
+        with open(self.cache_path) as f:
+            return json.load(f)["locations"]
+
+    def _save(self, entries):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp = self.cache_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(
+                {"fetched": self.fetched, "etag": self.etag, "locations": entries}, f
+            )
+        # replace in one step so a concurrent load never sees a partial file
+        os.replace(tmp, self.cache_path)
+
+    @staticmethod
+    def validate(entries):
+        """catalog entries reduced to the Location fields, with titled names
+
+        Raises:
+            ValueError: if any entry is missing a field or has no text name
+        """
+        try:
+            entries = [{field: entry[field] for field in _fields} for entry in entries]
+            for entry in entries:
+                entry["name"] = entry["name"].title()
+        except (KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f"Invalid location list entry: {e!r}") from e
+        return entries
+
+    @staticmethod
+    def apply(entries):
+        """update or add locations from catalog entries, returning changed names
+
+        Every entry is validated first, so a bad list changes nothing.
+
+        Raises:
+            ValueError: if any entry is invalid
+        """
+        changed = []
+        for entry in Catalog.validate(entries):
+            name = entry["name"]
+            loc = getattr(locations, name, None)
+            if isinstance(loc, Location):
+                if any(getattr(loc, field) != entry[field] for field in _fields):
+                    for field in _fields:
+                        setattr(loc, field, entry[field])
+                    changed.append(name)
+            elif loc is None:
+                setattr(locations, name, Location(**entry))
+                locations.all_locations.append(name)
+                changed.append(name)
+        return changed
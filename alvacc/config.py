@@ -1,13 +1,13 @@
 import os
 import sys
 import pkg_resources
-from datetime import datetime
 import yaml
 import importlib
 import re
 import readline
 
 from .locations import get_locations
+from . import dates
 
 
 def dist_is_editable(package_name):
@@ -46,6 +46,10 @@ class config:
         if self._reset_config or not self.get_config():
             self.set_config()
 
+    @property
+    def config_file(self):
+        return self._config_file
+
     @property
     def confirmation_url(self):
         return (
@@ -60,15 +64,10 @@ class config:
 
     @current_appointment_date.setter
     def current_appointment_date(self, date):
-        # ToDo: subclass datetime for simpler date handling
-        if isinstance(date, str):
-            date = datetime.strptime(
-                date,
-                "%B %d",
-            )
-        # add 1 to the year if month is in the past (assumes year wrap)
-        self._current_appointment_date = date.replace(
-            year=datetime.today().year + int(date.month < datetime.today().month)
+        self._current_appointment_date = (
+            dates.parse_month_day(date)
+            if isinstance(date, str)
+            else dates.resolve_year(date)
         )
 
     def get_config(self):
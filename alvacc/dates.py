@@ -0,0 +1,89 @@
+import time
+import calendar
+import functools
+from datetime import datetime, timedelta
+
+# anything with time() and sleep() like the time module, swapped out for simulation
+_clock = time
+# (midnight today, timestamp of midnight, timestamp of next midnight)
+_reference = None
+
+
+def set_clock(clock=None):
+    """use a different clock for now, sleep and today, or the system clock if None"""
+    global _clock, _reference
+    _clock = clock or time
+    _reference = None
+
+
+def now():
+    return _clock.time()
+
+
+def sleep(seconds):
+    _clock.sleep(seconds)
+
+
+def today():
+    """midnight of the current day, only rebuilt when the day rolls over"""
+    global _reference
+    t = _clock.time()
+    if _reference is None or not _reference[1] <= t < _reference[2]:
+        midnight = datetime.fromtimestamp(t).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        _reference = (
+            midnight,
+            midnight.timestamp(),
+            (midnight + timedelta(days=1)).timestamp(),
+        )
+    return _reference[0]
+
+
+def resolve_year(date):
+    """set the year of a month and day so it isn't in a past month
+
+    Dates are only given as month and day, so a month before the current one
+    is assumed to be in the next year.
+    """
+    reference = today()
+    year = reference.year + int(date.month < reference.month)
+    # February 29 can only be in a leap year, take the next one
+    if (date.month, date.day) == (2, 29):
+        while not calendar.isleap(year):
+            year += 1
+    return date.replace(year=year)
+
+
+@functools.lru_cache(maxsize=512)
+def _month_day(text):
+    # parse against a leap year so February 29 is accepted
+    date = datetime.strptime(f"{text} 2000", "%B %d %Y")
+    return date.month, date.day
+
+
+def parse_month_day(text):
+    """parse `Month day` text (e.g. June 14) into the next matching date
+
+    Raises:
+        ValueError: if the text is not in `Month day` format
+    """
+    month, day = _month_day(text.strip())
+    return resolve_year(datetime(2000, month, day))
+
+
+class SimulatedClock:
+    """Clock where sleeping only moves time forward, for fast simulation
+
+    Args:
+        start: starting timestamp, defaults to the current time
+    """
+
+    def __init__(self, start=None):
+        self.now = time.time() if start is None else start
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += max(0, seconds)
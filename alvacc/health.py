@@ -0,0 +1,81 @@
+from collections import deque
+
+
+class Health:
+    """Recent query outcomes for a location, with a circuit breaker
+
+    The breaker opens after `threshold` failures in a row, and the location
+    isn't queried while it is open. Once the delay passes a single probe is
+    allowed through. A successful probe closes the breaker, and a failed one
+    reopens it with the delay doubled, up to `max_delay`.
+
+    Args:
+        window: number of recent outcomes the error rate is taken over
+        threshold: failures in a row before the breaker opens
+        delay: time (seconds) before the first probe after opening
+        max_delay: longest time (seconds) between probes
+    """
+
+    closed = "closed"
+    open = "open"
+    half_open = "half-open"
+
+    def __init__(self, window=20, threshold=5, delay=60, max_delay=3600):
+        self.threshold = threshold
+        self.delay = delay
+        self.max_delay = max_delay
+        self.outcomes = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.parse_failures = 0
+        self.state = Health.closed
+        self.retry_at = None
+        # whether the last recorded outcome moved the breaker to another state
+        self.state_changed = False
+        self._opened = 0
+
+    def __repr__(self):
+        return (
+            f"{self.state}, {self.consecutive_failures} failures, "
+            f"{self.error_rate:.0%} errors"
+        )
+
+    @property
+    def error_rate(self):
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0
+
+    def allow(self, now):
+        """whether the location should be queried now"""
+        if self.state == Health.open and now >= self.retry_at:
+            self.state = Health.half_open
+        return self.state != Health.open
+
+    def success(self, now):
+        self.outcomes.append(True)
+        self.consecutive_failures = 0
+        self.state_changed = self.state != Health.closed
+        self.state = Health.closed
+        self.retry_at = None
+        self._opened = 0
+        return self.state_changed
+
+    def failure(self, now, parse=False):
+        """record a failed query, returning whether the breaker opened
+
+        Args:
+            now: time of the query
+            parse: whether the site answered with something unparseable
+        """
+        self.outcomes.append(False)
+        self.consecutive_failures += 1
+        self.parse_failures += int(parse)
+        self.state_changed = self.state == Health.half_open or (
+            self.state == Health.closed
+            and self.consecutive_failures >= self.threshold
+        )
+        if self.state_changed:
+            self._opened += 1
+            self.state = Health.open
+            self.retry_at = now + min(
+                self.delay * 2 ** (self._opened - 1), self.max_delay
+            )
+        return self.state_changed
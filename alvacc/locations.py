@@ -1,56 +1,140 @@
 import sys
+import itertools
+import threading
 from dataclasses import dataclass
 from datetime import datetime
 import urllib.request
 import json
 
+from . import dates
+from .health import Health
 
-class Availability:
-    def __init__(self, next_avail=None):
-        self.is_new = False
-        self._current = next_avail
+# root of the appointment endpoints, can be pointed at a local stand-in
+base_url = "https://al-telegov.egov.com/alabamavaccine/CustomerCreateAppointments"
+
+
+_versions = itertools.count(1)
+_versions_lock = threading.Lock()
+_latest_version = 0
+
+
+def _next_version():
+    global _latest_version
+    with _versions_lock:
+        _latest_version = next(_versions)
+        return _latest_version
+
+
+def current_version():
+    """latest version published by any Availability"""
+    return _latest_version
+
+
+@dataclass(frozen=True)
+class AvailabilitySnapshot:
+    """Immutable view of an Availability at one version"""
+
+    current: "next_avail" = None
+    is_new: bool = False
+    version: int = 0
 
     def __repr__(self):
         return (
-            self._current.date.strftime("%B %d")
-            if self._current and self._current.date
+            self.current.date.strftime("%B %d")
+            if self.current and self.current.date
             else "No availability"
         )
 
+
+class Availability:
+    """Next availability at a location, safe to share between threads
+
+    Each update publishes a new immutable snapshot, tagged with a version that
+    increases across all locations. Readers take `snapshot` once for a
+    consistent view, and `changed_since` tells whether an update landed after a
+    version they saw earlier.
+    """
+
+    def __init__(self, next_avail=None):
+        self._lock = threading.Lock()
+        self._snapshot = AvailabilitySnapshot(next_avail)
+
+    def __repr__(self):
+        return repr(self._snapshot)
+
+    def __getstate__(self):
+        # locks can't be pickled, e.g. when handing locations to workers
+        return {"_snapshot": self._snapshot}
+
+    def __setstate__(self, state):
+        self._lock = threading.Lock()
+        self._snapshot = state["_snapshot"]
+
+    @property
+    def snapshot(self):
+        return self._snapshot
+
+    @property
+    def is_new(self):
+        return self._snapshot.is_new
+
+    @property
+    def version(self):
+        return self._snapshot.version
+
+    def changed_since(self, version):
+        return self._snapshot.version > version
+
     @property
     def current(self):
-        return self._current
+        return self._snapshot.current
 
     @current.setter
     def current(self, next_avail):
-        if self._current and next_avail and self._current.date == next_avail.date:
-            self.is_new = False
-        else:
-            self.is_new = True
-            self._current = next_avail
+        with self._lock:
+            old = self._snapshot
+            if old.current and next_avail and old.current.date == next_avail.date:
+                # unchanged, only publish to clear is_new
+                if old.is_new:
+                    self._snapshot = AvailabilitySnapshot(
+                        old.current, False, _next_version()
+                    )
+            else:
+                self._snapshot = AvailabilitySnapshot(
+                    next_avail, True, _next_version()
+                )
+
+
+def _snapshot_date(snapshot):
+    return (snapshot.current.date if snapshot.current else None) or datetime.max
 
 
 def sort_avail(avail) -> dict:
     try:
-        return(
-            {
+        if isinstance(avail, dict):
+            return {
                 name: date
                 for name, date in sorted(
                     avail.items(), key=lambda c: c[1] or datetime.max
                 )
             }
-            if isinstance(avail, dict)
-            else {
-                loc.name: loc.availability
-                for loc in sorted(
-                    avail, key=lambda c: c.availability.current.date or datetime.max
-                )
-            }
-        )
+        # take each snapshot once so sorting and rendering see the same state
+        snapshots = [(loc.name, loc.availability.snapshot) for loc in avail]
+        return {
+            name: snapshot
+            for name, snapshot in sorted(snapshots, key=lambda c: _snapshot_date(c[1]))
+        }
     except AttributeError:
         return {}
 
 
+class ResultPending(OSError):
+    """No result for a location yet because another worker or process is on it
+
+    Not a failure of the location, so it isn't counted against its health.
+    """
+
+
 class next_avail:
     def __init__(self, response):
         # response text of following form (including ")
@@ -58,19 +142,25 @@ class next_avail:
         # ex. "June 14, 125 available."
         self.text = response.read().decode("utf-8").strip('"')
         try:
-            # ToDo: subclass datetime for simpler date handling
-            date = datetime.strptime(
-                self.text.split(", ")[0],
-                "%B %d",
-            )
-            # add 1 to the year if month is in the past (assumes year wrap)
-            self.date = date.replace(
-                year=datetime.today().year + int(date.month < datetime.today().month)
-            )
+            self.date = dates.parse_month_day(self.text.split(", ")[0])
             self.num_available = int(self.text.split()[2])
         except ValueError:
             self.date = self.num_available = None
 
+    @property
+    def parsed(self):
+        """False if the reply was neither a date nor a message about availability"""
+        return self.date is not None or "available" in self.text.lower()
+
+    @classmethod
+    def from_fields(cls, text, date, num_available):
+        """build from already parsed values, skipping the response parsing"""
+        na = cls.__new__(cls)
+        na.text = text
+        na.date = date
+        na.num_available = num_available
+        return na
+
     def __repr__(self):
         return self.text
 
@@ -91,12 +181,13 @@ class Location:
         self.zip_code = zip_code
         self.location_id = location_id
         self.availability = Availability()
+        self.health = Health()
 
     def __repr__(self):
         return f"{self.__class__.__name__}({', '.join([k + '=' + repr(v) for k, v in self.__dict__.items()])})"
 
     def check_next_available(self):
-        url = f"https://al-telegov.egov.com/alabamavaccine/CustomerCreateAppointments/GetEarliestAvailability?appointmentTypeId=1&locationId={self.location_id}"
+        url = f"{base_url}/GetEarliestAvailability?appointmentTypeId=1&locationId={self.location_id}"
         with urllib.request.urlopen(url) as f:
             na = next_avail(f)
         return na
@@ -104,7 +195,7 @@ class Location:
     def get_available_dates_for_month(self, month):
         if isinstance(month, str):
             month = datetime.strptime(month.strip(), ["%b", "%B", "%m"])
-        url = f"https://al-telegov.egov.com/alabamavaccine/CustomerCreateAppointments/GetAvailableDatesForMonth?duration=15&locationId={self.location_id}&date=2021-{month:02d}-01T06:00:00.000Z"
+        url = f"{base_url}/GetAvailableDatesForMonth?duration=15&locationId={self.location_id}&date=2021-{month:02d}-01T06:00:00.000Z"
         with urllib.request.urlopen(url) as f:
             days = [
                 datetime.datetime.strptime(x, "%Y-%m-%dT%H:%M:%S")
@@ -0,0 +1,119 @@
+import os
+import sys
+import json
+from datetime import datetime
+
+from .locations import sort_avail
+
+
+def bold(text, should_bold=True):
+    """add term codes to make bold and escape
+
+    Args:
+        text: text to be printed as bold
+        should_bold: bool to return bold or original
+    """
+    return f"\033[1m{text}\033[0m" if should_bold else text
+
+
+class TerminalOutput:
+    """Redraw the full availability list whenever something changes"""
+
+    def __init__(self, locations, stream=None):
+        self.stream = stream or sys.stdout
+        self.max_name_len = max([len(loc.name) for loc in locations])
+
+    def observe(self, loc, checked, earlier=False):
+        if earlier:
+            print(f"--- New Appointment Available! ---", file=self.stream)
+
+    def error(self, loc, checked, exc):
+        pass
+
+    def cycle(self, locations, checked, changed):
+        current_time = datetime.fromtimestamp(checked).strftime("%H:%M:%S")
+        if changed:
+            os.system("cls" if os.name == "nt" else "clear")
+            print(current_time, file=self.stream)
+            health = {loc.name: loc.health for loc in locations}
+            # print all, bolding changes and noting locations that keep failing
+            print_strings = [
+                f"  {name:{self.max_name_len}} - {bold(str(avail), avail.is_new)}"
+                + (
+                    f" (paused: {health[name]})"
+                    if health[name].state != health[name].closed
+                    else ""
+                )
+                for name, avail in sort_avail(locations).items()
+            ]
+            print("\n".join(print_strings), file=self.stream)
+        paused = sum(loc.health.state != loc.health.closed for loc in locations)
+        print(
+            "Last checked at "
+            + str(current_time)
+            + (f", {paused} paused after repeated errors" if paused else ""),
+            end="\r",
+            file=self.stream,
+        )
+
+
+class NDJSONWriter:
+    """Stream one compact JSON record per observation
+
+    Records are left in the stream's buffer and only flushed once a change is
+    written, so unchanged polls cost no syscalls.
+
+    Args:
+        stream: text stream to write to, defaults to stdout
+    """
+
+    def __init__(self, locations=None, stream=None):
+        self.stream = stream or sys.stdout
+        self._encode = json.JSONEncoder(separators=(",", ":")).encode
+
+    def write(self, record, flush=False):
+        self.stream.write(self._encode(record) + "\n")
+        if flush:
+            self.stream.flush()
+
+    def observe(self, loc, checked, earlier=False):
+        snapshot = loc.availability.snapshot
+        current = snapshot.current
+        self.write(
+            {
+                "time": round(checked, 3),
+                "location": loc.name,
+                "location_id": loc.location_id,
+                "date": current.date.strftime("%Y-%m-%d") if current.date else None,
+                "available": current.num_available,
+                "new": snapshot.is_new,
+                "earlier": earlier,
+                **self._health(loc),
+            },
+            flush=snapshot.is_new or loc.health.state_changed,
+        )
+
+    def error(self, loc, checked, exc):
+        self.write(
+            {
+                "time": round(checked, 3),
+                "location": loc.name,
+                "location_id": loc.location_id,
+                "error": str(exc),
+                "failures": loc.health.consecutive_failures,
+                "error_rate": round(loc.health.error_rate, 3),
+                **self._health(loc),
+            },
+            flush=loc.health.state_changed,
+        )
+
+    @staticmethod
+    def _health(loc):
+        # circuit state is only written when it changes
+        return {"circuit": loc.health.state} if loc.health.state_changed else {}
+
+    def cycle(self, locations, checked, changed):
+        pass
+
+
+formats = {"terminal": TerminalOutput, "ndjson": NDJSONWriter}
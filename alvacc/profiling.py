@@ -0,0 +1,84 @@
+import cProfile
+import pstats
+import threading
+import tracemalloc
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class StandIn:
+    """Local server answering availability queries with a fixed reply
+
+    Args:
+        reply: response text for every location
+    """
+
+    def __init__(self, reply='"June 14, 125 available."'):
+        body = reply.encode("utf-8")
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+
+    @property
+    def url(self):
+        return "http://%s:%d" % self._httpd.server_address
+
+    def start(self):
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def run(fn, prefix="alvacc-profile", top=40):
+    """call fn under cProfile and tracemalloc, writing the results to files
+
+    Args:
+        fn: function to profile
+        prefix: path prefix of the files written
+        top: number of entries in each list
+
+    Returns:
+        list of paths written
+    """
+    tracemalloc.start(10)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        fn()
+    finally:
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+    paths = [f"{prefix}.prof", f"{prefix}.txt", f"{prefix}.alloc.txt"]
+    # raw stats for snakeviz, pstats etc.
+    profiler.dump_stats(paths[0])
+    with open(paths[1], "w") as f:
+        stats = pstats.Stats(profiler, stream=f)
+        for sort in ("cumulative", "tottime"):
+            print(f"--- sorted by {sort} ---", file=f)
+            stats.sort_stats(sort).print_stats(top)
+    snapshot = snapshot.filter_traces(
+        [tracemalloc.Filter(False, tracemalloc.__file__)]
+    )
+    with open(paths[2], "w") as f:
+        for key in ("lineno", "traceback"):
+            print(f"--- top allocations by {key} ---", file=f)
+            for stat in snapshot.statistics(key)[: top if key == "lineno" else 5]:
+                print(stat, file=f)
+                if key == "traceback":
+                    print("\n".join(stat.traceback.format()), file=f)
+    return paths
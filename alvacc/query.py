@@ -0,0 +1,143 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+
+from . import dates
+from .locations import Location
+
+
+class ResponseCache:
+    """Bounded least recently used cache of results by location id
+
+    Entries older than the age a caller accepts are dropped when looked up,
+    and the least recently used entry is dropped once maxsize is reached.
+    Lookups for a location already being queried wait on that query instead
+    of starting another.
+
+    Args:
+        maxsize: most locations kept
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get(self, location_id, max_age):
+        """cached result no older than max_age (seconds), or None"""
+        with self._lock:
+            entry = self._entries.get(location_id)
+            if entry is None:
+                return None
+            if dates.now() - entry[0] > max_age:
+                del self._entries[location_id]
+                return None
+            self._entries.move_to_end(location_id)
+            return entry[1]
+
+    def put(self, location_id, na, checked=None):
+        with self._lock:
+            self._entries[location_id] = (
+                dates.now() if checked is None else checked,
+                na,
+            )
+            self._entries.move_to_end(location_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def fetch(self, loc, max_age, submit, check=Location.check_next_available):
+        """future for a location's result, from the cache, a pending query, or a new one
+
+        Args:
+            loc: Location to look up
+            max_age: oldest cached result accepted (seconds)
+            submit: function scheduling a callable, e.g. ThreadPoolExecutor.submit
+            check: function called with the Location to query it
+        """
+        na = self.get(loc.location_id, max_age)
+        if na is not None:
+            future = Future()
+            future.set_result(na)
+            return future
+        with self._lock:
+            future = self._pending.get(loc.location_id)
+            if future is not None:
+                return future
+            future = self._pending[loc.location_id] = Future()
+        # submitted outside the lock, submit may run the query right away
+        try:
+            submitted = submit(self._query, loc, check)
+        except BaseException as e:
+            with self._lock:
+                self._pending.pop(loc.location_id, None)
+            future.set_exception(e)
+            raise
+        submitted.add_done_callback(lambda done: _copy(done, future))
+        return future
+
+    def _query(self, loc, check):
+        checked = dates.now()
+        try:
+            na = check(loc)
+            self.put(loc.location_id, na, checked)
+            return na
+        finally:
+            with self._lock:
+                self._pending.pop(loc.location_id, None)
+
+
+def _copy(source, target):
+    """pass the outcome of a finished future on to another"""
+    if source.cancelled():
+        target.cancel()
+    elif source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
+
+
+# shared by every caller in the process unless a cache is passed explicitly
+response_cache = ResponseCache()
+
+
+def check_many(
+    locations,
+    max_age=60,
+    max_workers=8,
+    cache=None,
+    check=Location.check_next_available,
+):
+    """next availability for many locations at once
+
+    Args:
+        locations: Locations to check
+        max_age: oldest cached result to accept (seconds), 0 always queries
+        max_workers: most queries in flight at once
+        cache: ResponseCache to use, defaults to the one shared in this process
+        check: function called with a Location to query it
+
+    Returns:
+        dict of location name to next_avail, or to the OSError raised querying it
+    """
+    cache = response_cache if cache is None else cache
+    locations = list(locations)
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {
+            loc.name: cache.fetch(loc, max_age, executor.submit, check)
+            for loc in locations
+        }
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except OSError as e:
+                results[name] = e
+    return results
@@ -0,0 +1,110 @@
+import json
+from collections import defaultdict
+from datetime import datetime
+
+
+def load_changes(path):
+    """times availability changed at each location in an ndjson output log
+
+    A location's first observation, and any later one reporting the same date
+    as the observation before it, is flagged new only because alvacc started
+    (or restarted) without knowing it, so these aren't counted as changes.
+
+    Returns:
+        dict of location id to list of change timestamps
+    """
+    changes = defaultdict(list)
+    last_date = {}
+    with open(path) as f:
+        for line in f:
+            record = json.loads(line)
+            if "location_id" not in record or "error" in record:
+                continue
+            location_id = record["location_id"]
+            seen = location_id in last_date
+            previous = last_date.get(location_id)
+            last_date[location_id] = record.get("date")
+            if record.get("new") and seen and record.get("date") != previous:
+                changes[location_id].append(record["time"])
+    return changes
+
+
+class ReleaseWindows:
+    """Learn when each location tends to release slots, and poll around then
+
+    Observed changes are binned by time of day, and by time of day per weekday.
+    Any bin that has collected enough changes, along with its neighbors, is
+    treated as a release window and polled at the burst interval. Outside of
+    windows locations are polled at the sparse interval.
+
+    Args:
+        burst: time between queries inside a release window (seconds)
+        sparse: time between queries outside of release windows (seconds)
+        bucket: width of a time of day bin (seconds)
+        margin: number of neighboring bins on each side also polled at burst rate
+        min_weekly: changes in a weekday bin before it counts as a window
+        min_daily: changes in a time of day bin before it counts as a window
+    """
+
+    def __init__(
+        self, burst=30, sparse=300, bucket=900, margin=1, min_weekly=2, min_daily=3
+    ):
+        self.burst = burst
+        self.sparse = sparse
+        self.bucket = bucket
+        self.margin = margin
+        self.min_weekly = min_weekly
+        self.min_daily = min_daily
+        self._buckets = 86400 // bucket
+        self._daily = defaultdict(lambda: [0] * self._buckets)
+        self._weekly = defaultdict(lambda: [[0] * self._buckets for _ in range(7)])
+
+    def _bin(self, when):
+        dt = datetime.fromtimestamp(when)
+        seconds = dt.hour * 3600 + dt.minute * 60 + dt.second
+        return dt.weekday(), seconds // self.bucket
+
+    def record(self, location_id, when):
+        """note a change in availability at a location
+
+        Args:
+            location_id: id of the location that changed
+            when: timestamp the change was seen
+        """
+        weekday, b = self._bin(when)
+        self._daily[location_id][b] += 1
+        self._weekly[location_id][weekday][b] += 1
+
+    def load(self, path):
+        """learn from changes recorded in an ndjson output log"""
+        for location_id, times in load_changes(path).items():
+            for when in times:
+                self.record(location_id, when)
+        return self
+
+    def in_window(self, location_id, when):
+        if location_id not in self._daily:
+            return False
+        weekday, b = self._bin(when)
+        daily = self._daily[location_id]
+        weekly = self._weekly[location_id][weekday]
+        for offset in range(-self.margin, self.margin + 1):
+            i = (b + offset) % self._buckets
+            if daily[i] >= self.min_daily or weekly[i] >= self.min_weekly:
+                return True
+        return False
+
+    def interval(self, location_id, when):
+        """time (seconds) to wait before querying a location again
+
+        Outside of a window the wait is cut short so the next query lands at
+        the start of an upcoming window rather than partway through it.
+        """
+        if self.in_window(location_id, when):
+            return self.burst
+        start = (when // self.bucket + 1) * self.bucket
+        while start < when + self.sparse:
+            if self.in_window(location_id, start):
+                return max(self.burst, start - when)
+            start += self.bucket
+        return self.sparse
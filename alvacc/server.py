@@ -0,0 +1,169 @@
+import json
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+from .locations import sort_avail
+
+_page = b"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>alvacc</title></head>
+<body><pre id="board">Waiting for availability...</pre>
+<script>
+new EventSource("/events").onmessage = function (e) {
+  var snap = JSON.parse(e.data);
+  if (!snap.updated) return;
+  document.getElementById("board").innerHTML =
+    new Date(snap.updated * 1000).toLocaleTimeString() + "\\n" +
+    snap.locations.map(function (l) {
+      var text = l.date ? l.date + " (" + l.available + ")" : "No availability";
+      return "  " + l.name.padEnd(12) + " - " + (l.new ? "<b>" + text + "</b>" : text) +
+        (l.circuit === "closed" ? "" : " (paused)");
+    }).join("\\n");
+};
+</script></body></html>
+"""
+
+
+class SnapshotServer:
+    """Serve the current availability to any number of viewers
+
+    The snapshot is encoded once per change, then handed out as is from
+    `/snapshot.json` (long-polled with `?since=VERSION`) and pushed to
+    server-sent event streams on `/events`, so viewers never cause queries.
+
+    Args:
+        host: address to listen on
+        port: port to listen on
+        keepalive: time (seconds) between keepalive comments on idle event streams
+    """
+
+    def __init__(self, host="127.0.0.1", port=8000, keepalive=15):
+        self.keepalive = keepalive
+        self.version = 0
+        self._body = json.dumps(
+            {"version": 0, "updated": None, "locations": []}
+        ).encode("utf-8")
+        self._changed = threading.Condition()
+        self._closed = False
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, body, content_type):
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == "/":
+                    self._send(_page, "text/html; charset=utf-8")
+                elif url.path == "/snapshot.json":
+                    since = parse_qs(url.query).get("since")
+                    try:
+                        since = int(since[0]) if since else None
+                    except ValueError:
+                        self.send_error(400, "since must be a version number")
+                        return
+                    version, body = server.wait(since, server.keepalive * 2)
+                    self._send(body, "application/json")
+                elif url.path == "/events":
+                    self._stream()
+                else:
+                    self.send_error(404)
+
+            def _stream(self):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                sent = None
+                try:
+                    while not server._closed:
+                        version, body = server.wait(sent, server.keepalive)
+                        if version == sent:
+                            self.wfile.write(b": keepalive\n\n")
+                        else:
+                            self.wfile.write(
+                                b"id: %d\ndata: %s\n\n" % (version, body)
+                            )
+                            sent = version
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+        return Handler
+
+    @property
+    def address(self):
+        return self._httpd.server_address
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        with self._changed:
+            self._closed = True
+            self._changed.notify_all()
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def wait(self, since=None, timeout=None):
+        """current version and encoded snapshot, blocking until newer than since
+
+        Args:
+            since: version already seen by the caller, or None to return immediately
+            timeout: longest time (seconds) to block
+        """
+        with self._changed:
+            if since is not None:
+                self._changed.wait_for(
+                    lambda: self.version != since or self._closed, timeout
+                )
+            return self.version, self._body
+
+    def publish(self, locations, checked):
+        """encode a new snapshot of locations and wake any waiting viewers"""
+        health = {loc.name: loc.health for loc in locations}
+        snapshot = [
+            {
+                "name": name,
+                "date": avail.current.date.strftime("%Y-%m-%d")
+                if avail.current and avail.current.date
+                else None,
+                "available": avail.current.num_available if avail.current else None,
+                "new": avail.is_new,
+                "circuit": health[name].state,
+            }
+            for name, avail in sort_avail(locations).items()
+        ]
+        with self._changed:
+            self.version += 1
+            self._body = json.dumps(
+                {"version": self.version, "updated": checked, "locations": snapshot},
+                separators=(",", ":"),
+            ).encode("utf-8")
+            self._changed.notify_all()
+
+    # output interface, see output.py
+    def observe(self, loc, checked, earlier=False):
+        pass
+
+    def error(self, loc, checked, exc):
+        pass
+
+    def cycle(self, locations, checked, changed):
+        if changed:
+            self.publish(locations, checked)
@@ -0,0 +1,198 @@
+import struct
+import time
+import multiprocessing
+from multiprocessing import shared_memory
+from datetime import datetime
+
+from .locations import Location, next_avail, ResultPending
+
+# one fixed-size record per location in the shared status table
+# seq, checked timestamp, date ordinal (0 if none), num available (-1 if none),
+# error flag, response text
+_RECORD = struct.Struct("<QdiiB55s")
+_SEQ = struct.Struct("<Q")
+# after the records, one timestamp per location before which workers skip it
+_DEFER = struct.Struct("<d")
+
+
+def _write(buf, slot, checked, na=None):
+    """write a record using a sequence lock so readers never see a torn record
+
+    Args:
+        buf: shared memory buffer
+        slot: index of the location in the table
+        checked: timestamp of the query
+        na: next_avail result, or None if the query failed
+    """
+    offset = slot * _RECORD.size
+    # odd sequence marks the record as being written, a worker killed
+    # mid-write can leave it odd so always start from the next odd value
+    (seq,) = _SEQ.unpack_from(buf, offset)
+    seq |= 1
+    _SEQ.pack_into(buf, offset, seq)
+    _RECORD.pack_into(
+        buf,
+        offset,
+        seq,
+        checked,
+        na.date.toordinal() if na and na.date else 0,
+        na.num_available if na and na.num_available is not None else -1,
+        na is None,
+        na.text.encode("utf-8")[: _RECORD.size - 25] if na else b"",
+    )
+    _SEQ.pack_into(buf, offset, seq + 1)
+
+
+def _read(buf, slot, retries=1000):
+    """read a consistent record, giving up if it stays mid-write
+
+    Raises:
+        ResultPending: if no consistent record was read within retries
+    """
+    offset = slot * _RECORD.size
+    for _ in range(retries):
+        record = _RECORD.unpack_from(buf, offset)
+        if record[0] % 2 == 0 and _SEQ.unpack_from(buf, offset)[0] == record[0]:
+            return record
+    raise ResultPending(f"Status record {slot} is still being written")
+
+
+def _worker(shm_name, shard, sleep_time, check, defer_offset):
+    """poll a shard of locations forever, publishing into the status table
+
+    Args:
+        shm_name: name of the shared memory status table
+        shard: list of (slot, Location) pairs owned by this worker
+        sleep_time: time to sleep between queries (seconds)
+        check: function called with a Location to query it
+        defer_offset: offset of the deferral timestamps in the table
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        while True:
+            for slot, loc in shard:
+                # paused by the coordinator, e.g. while its breaker is open
+                (until,) = _DEFER.unpack_from(
+                    shm.buf, defer_offset + slot * _DEFER.size
+                )
+                if time.time() < until:
+                    continue
+                try:
+                    na = check(loc)
+                except OSError:
+                    na = None
+                _write(shm.buf, slot, time.time(), na)
+            time.sleep(sleep_time)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shm.close()
+
+
+class ShardedPoller:
+    """Spread polling of locations across worker processes
+
+    Workers write results into a shared memory status table, which the
+    coordinator reads with `check` in place of `Location.check_next_available`.
+    Dead workers are restarted with their shard on `supervise`, and workers
+    skip a location until the time given to `defer`.
+    """
+
+    def __init__(
+        self, locations, workers, sleep_time, check=Location.check_next_available
+    ):
+        self.locations = list(locations)
+        self.sleep_time = sleep_time
+        self.check_location = check
+        self._slots = {loc.location_id: i for i, loc in enumerate(self.locations)}
+        slots = list(enumerate(self.locations))
+        self._shards = [slots[i::workers] for i in range(workers)]
+        self._procs = [None] * len(self._shards)
+        self._seen = {}
+        self._defer_offset = _RECORD.size * len(self.locations)
+        self._shm = shared_memory.SharedMemory(
+            create=True,
+            size=(_RECORD.size + _DEFER.size) * max(len(self.locations), 1),
+        )
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _spawn(self, index):
+        proc = multiprocessing.Process(
+            target=_worker,
+            args=(
+                self._shm.name,
+                self._shards[index],
+                self.sleep_time,
+                self.check_location,
+                self._defer_offset,
+            ),
+            daemon=True,
+        )
+        proc.start()
+        self._procs[index] = proc
+
+    def start(self):
+        for index, shard in enumerate(self._shards):
+            if shard:
+                self._spawn(index)
+
+    def supervise(self):
+        """restart any worker that has died, returning the number restarted"""
+        restarted = 0
+        for index, proc in enumerate(self._procs):
+            if proc and not proc.is_alive():
+                proc.join()
+                self._spawn(index)
+                restarted += 1
+        return restarted
+
+    def defer(self, loc, until):
+        """have workers skip a location until a timestamp"""
+        _DEFER.pack_into(
+            self._shm.buf,
+            self._defer_offset + self._slots[loc.location_id] * _DEFER.size,
+            until or 0,
+        )
+
+    def check(self, loc):
+        """latest result for a location from the status table
+
+        Raises:
+            ResultPending: if the location has not been queried yet, or its
+                last query failed and that failure was already reported
+            OSError: if the last query failed
+        """
+        slot = self._slots[loc.location_id]
+        seq, checked, date, num_available, error, text = _read(self._shm.buf, slot)
+        if not seq:
+            raise ResultPending(f"No result yet for {loc.name}")
+        cached = self._seen.get(slot)
+        if error:
+            if cached and cached[0] == seq:
+                # a failure counts once, not on every read until the next query
+                raise ResultPending(f"No new result for {loc.name}")
+            self._seen[slot] = (seq, None)
+            raise OSError(f"Query failed for {loc.name}")
+        if cached and cached[0] == seq:
+            return cached[1]
+        na = next_avail.from_fields(
+            text.rstrip(b"\0").decode("utf-8", "replace"),
+            datetime.fromordinal(date) if date else None,
+            num_available if num_available >= 0 else None,
+        )
+        self._seen[slot] = (seq, na)
+        return na
+
+    def close(self):
+        for proc in self._procs:
+            if proc:
+                proc.terminate()
+                proc.join()
+        self._shm.close()
+        self._shm.unlink()
@@ -0,0 +1,114 @@
+import os
+import sys
+import json
+import hashlib
+from datetime import datetime
+
+from . import dates
+from .locations import Availability, next_avail
+
+
+class StateFile:
+    """Keep the last known availability on disk to resume from after a restart
+
+    Saved every `interval` seconds while polling and again on shutdown. For
+    each location this stores the response, when it was last checked and last
+    changed, and the interval until its next check. Restored locations aren't
+    flagged as new, and aren't queried until their next check is due.
+
+    Args:
+        path: file to save state in
+        interval: time between saves while polling (seconds)
+        config_file: config the state belongs to, picks the default path so
+            instances with different configs don't overwrite each other
+    """
+
+    def __init__(self, path=None, interval=300, config_file=None):
+        key = hashlib.sha1(
+            os.path.realpath(config_file or "").encode("utf-8")
+        ).hexdigest()[:12]
+        self.path = path or os.path.join(
+            os.path.expanduser("~"), ".cache", "alvacc", f"state-{key}.json"
+        )
+        self.interval = interval
+        self.checked = {}
+        self.changed = {}
+        self.due = {}
+        self._saved = dates.now()
+
+    def restore(self, locations):
+        """load saved availability into locations
+
+        Returns:
+            dict of location id to the time its next check is due, shared
+            with the poll loop so intervals are saved as they change
+        """
+        try:
+            with open(self.path) as f:
+                saved = dict(json.load(f)["locations"])
+        except FileNotFoundError:
+            return self.due
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Ignoring unreadable state file {self.path}: {e!r}", file=sys.stderr)
+            return self.due
+        for loc in locations:
+            entry = saved.get(str(loc.location_id))
+            if not entry:
+                continue
+            try:
+                text, date, num_available, checked, changed, interval = entry
+                na = next_avail.from_fields(
+                    str(text),
+                    datetime.fromordinal(date) if date else None,
+                    None if num_available is None else int(num_available),
+                )
+                checked, interval = float(checked), float(interval)
+                changed = None if changed is None else float(changed)
+            except (ValueError, TypeError, OverflowError) as e:
+                print(
+                    f"Ignoring unreadable state for {loc.name}: {e!r}", file=sys.stderr
+                )
+                continue
+            loc.availability = Availability(na)
+            self.checked[loc.location_id] = checked
+            self.changed[loc.location_id] = changed
+            self.due[loc.location_id] = checked + interval
+        return self.due
+
+    def save(self, locations):
+        entries = {}
+        for loc in locations:
+            current = loc.availability.current
+            checked = self.checked.get(loc.location_id)
+            if current is None or checked is None:
+                continue
+            entries[loc.location_id] = [
+                current.text,
+                current.date.toordinal() if current.date else None,
+                current.num_available,
+                checked,
+                self.changed.get(loc.location_id),
+                max(0, self.due.get(loc.location_id, checked) - checked),
+            ]
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(
+                {"saved": dates.now(), "locations": entries}, f, separators=(",", ":")
+            )
+        # replace in one step so a crash mid-write keeps the previous state
+        os.replace(tmp, self.path)
+        self._saved = dates.now()
+
+    # output interface, see output.py
+    def observe(self, loc, checked, earlier=False):
+        self.checked[loc.location_id] = checked
+        if loc.availability.is_new:
+            self.changed[loc.location_id] = checked
+
+    def error(self, loc, checked, exc):
+        pass
+
+    def cycle(self, locations, checked, changed):
+        if checked - self._saved >= self.interval:
+            self.save(locations)
@@ -0,0 +1,215 @@
+import os
+import json
+import argparse
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# parsed columns kept in the cache alongside the log offset they cover
+_columns = ("location_id", "time", "date", "available", "new", "error")
+
+
+def _parse(path, offset):
+    """parse records past offset into column lists, returning them and the new offset"""
+    cols = {name: [] for name in _columns}
+    names = {}
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for line in f:
+            # stop at a partially written record, it is picked up next run
+            if not line.endswith(b"\n"):
+                break
+            offset += len(line)
+            record = json.loads(line)
+            names[record["location_id"]] = record["location"]
+            cols["location_id"].append(record["location_id"])
+            cols["time"].append(record["time"])
+            cols["date"].append(record.get("date") or "NaT")
+            cols["available"].append(record.get("available") or 0)
+            cols["new"].append(bool(record.get("new")))
+            cols["error"].append("error" in record)
+    return cols, names, offset
+
+
+def _head(path):
+    """first line of the log, to tell when it has been replaced"""
+    with open(path, "rb") as f:
+        return f.readline(256)
+
+
+def load(path, cache_path=None):
+    """load an ndjson output log into arrays, parsing only records added since the last load
+
+    Args:
+        path: ndjson log written by `alvacc --format ndjson`
+        cache_path: where to keep parsed columns, defaults to next to the log
+
+    Returns:
+        dict of column arrays, and dict of location names by id
+    """
+    cache_path = cache_path or path + ".stats.npz"
+    offset = 0
+    arrays = {
+        "location_id": np.empty(0, dtype=np.int64),
+        "time": np.empty(0, dtype=np.float64),
+        "date": np.empty(0, dtype="datetime64[D]"),
+        "available": np.empty(0, dtype=np.int64),
+        "new": np.empty(0, dtype=bool),
+        "error": np.empty(0, dtype=bool),
+    }
+    names = {}
+    head = _head(path)
+    if os.path.exists(cache_path):
+        with np.load(cache_path) as cached:
+            # log was truncated or replaced, start over
+            if (
+                "head" in cached.files
+                and cached["head"].tobytes() == head
+                and int(cached["offset"]) <= os.path.getsize(path)
+            ):
+                offset = int(cached["offset"])
+                arrays = {name: cached[name] for name in _columns}
+                names = dict(
+                    zip(cached["name_ids"].tolist(), cached["names"].tolist())
+                )
+    cols, new_names, new_offset = _parse(path, offset)
+    if new_offset != offset:
+        for name in _columns:
+            arrays[name] = np.concatenate(
+                [arrays[name], np.array(cols[name], dtype=arrays[name].dtype)]
+            )
+        names.update(new_names)
+        np.savez(
+            cache_path,
+            offset=new_offset,
+            head=np.frombuffer(head, dtype=np.uint8),
+            name_ids=np.array(list(names), dtype=np.int64),
+            names=np.array(list(names.values()), dtype=str),
+            **arrays,
+        )
+    return arrays, names
+
+
+def _group_median(keys, values, groups):
+    """median of values for each key in groups, nan for groups with no values"""
+    order = np.lexsort((values, keys))
+    keys, values = keys[order], values[order]
+    starts = np.searchsorted(keys, groups, side="left")
+    ends = np.searchsorted(keys, groups, side="right")
+    counts = ends - starts
+    if not len(values):
+        return np.full(len(groups), np.nan)
+    safe = np.maximum(counts, 1)
+    lo = values[np.minimum(starts + (safe - 1) // 2, len(values) - 1)]
+    hi = values[np.minimum(starts + safe // 2, len(values) - 1)]
+    return np.where(counts > 0, (lo + hi) / 2, np.nan)
+
+
+def compute(arrays):
+    """per location statistics from loaded log arrays
+
+    Returns:
+        dict of arrays indexed alongside the `location_id` array
+    """
+    order = np.lexsort((arrays["time"], arrays["location_id"]))
+    loc = arrays["location_id"][order]
+    t = arrays["time"][order]
+    date = arrays["date"][order]
+    error = arrays["error"][order]
+    new = arrays["new"][order]
+    groups = np.unique(loc)
+    idx = np.searchsorted(groups, loc)
+
+    observed = ~error & ~np.isnat(date)
+    days = (date.astype("datetime64[s]").astype(np.float64) - t) / 86400
+    lead = _group_median(loc[observed], days[observed], groups)
+
+    span = np.zeros(len(groups))
+    np.maximum.at(span, idx, t)
+    first = np.full(len(groups), np.inf)
+    np.minimum.at(first, idx, t)
+    span = np.maximum(span - first, 1) / 86400
+
+    # a location's first observation, and any reporting the same date as the
+    # observation before it, is only new because alvacc (re)started
+    positions = np.arange(len(t))
+    prev = np.roll(np.maximum.accumulate(np.where(error, -1, positions)), 1)
+    prev[:1] = -1
+    seen = prev >= 0
+    seen[seen] = loc[prev[seen]] == loc[seen]
+    repeat = seen.copy()
+    repeat[seen] = date[prev[seen]].view(np.int64) == date[seen].view(np.int64)
+    new = new & seen & ~repeat
+
+    # a change is earlier if it moves the date up from the observation before it
+    changed = np.flatnonzero(new & ~error)
+    c_loc, c_time, c_date = loc[changed], t[changed], date[changed]
+    c_prev = date[prev[changed]]
+    same = c_loc[1:] == c_loc[:-1]
+    earlier = ~np.isnat(c_date) & (np.isnat(c_prev) | (c_date < c_prev))
+    # an earlier slot lasts until the next change at that location
+    lasted = np.full(len(changed), np.nan)
+    lasted[:-1] = np.where(same, c_time[1:] - c_time[:-1], np.nan)
+    lasted = np.where(earlier, lasted, np.nan)
+    keep = ~np.isnan(lasted)
+
+    return {
+        "location_id": groups,
+        "observations": np.bincount(idx, weights=~error, minlength=len(groups)),
+        "errors": np.bincount(idx, weights=error, minlength=len(groups)),
+        "median_lead_days": lead,
+        "earlier_per_day": np.bincount(
+            np.searchsorted(groups, c_loc), weights=earlier, minlength=len(groups)
+        )
+        / span,
+        "median_lasted": _group_median(c_loc[keep], lasted[keep], groups),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="alvacc stats",
+        description="Summarize availability from an ndjson output log",
+    )
+    parser.add_argument("log", help="ndjson log written by `alvacc --format ndjson`")
+    parser.add_argument(
+        "--cache",
+        action="store",
+        dest="cache",
+        help="path to cache parsed records, defaults to LOG.stats.npz",
+        default=None,
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if np is None:
+        print("alvacc stats requires numpy, install with `pip install alvacc[stats]`")
+        return 1
+    arrays, names = load(args.log, args.cache)
+    if not len(arrays["location_id"]):
+        print("No records in log")
+        return 0
+    stats = compute(arrays)
+    max_name_len = max(len(name) for name in [*names.values(), "location"])
+    print(
+        f"  {'location':{max_name_len}}  {'polls':>7} {'errors':>6} "
+        f"{'lead (days)':>11} {'earlier/day':>11} {'lasted (s)':>10}"
+    )
+    for i in np.argsort(stats["median_lead_days"]):
+        print(
+            f"  {names[int(stats['location_id'][i])]:{max_name_len}}  "
+            f"{int(stats['observations'][i]):7d} {int(stats['errors'][i]):6d} "
+            f"{stats['median_lead_days'][i]:11.1f} {stats['earlier_per_day'][i]:11.2f} "
+            f"{stats['median_lasted'][i]:10.0f}"
+        )
+    lasted = stats["median_lasted"][~np.isnan(stats["median_lasted"])]
+    if len(lasted):
+        print(
+            f"Earlier slots last a median of {np.median(lasted):.0f}s, "
+            f"a --sleep under {np.median(lasted) / 2:.0f}s should catch most of them"
+        )
+    return 0
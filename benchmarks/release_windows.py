@@ -0,0 +1,109 @@
+"""Replay recorded availability changes to compare polling strategies
+
+Reports query count and detection latency for uniform polling at the sleep
+and burst intervals against polling with learned release windows. Changes are
+read from an ndjson output log (`alvacc --format ndjson`), or generated when
+no log is given.
+
+usage: python benchmarks/release_windows.py [LOG] [--sleep 300] [--burst 30]
+"""
+import os
+import sys
+import random
+import argparse
+from collections import defaultdict
+from datetime import datetime, timedelta
+from statistics import mean, median
+
+# run from a checkout without installing
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alvacc.schedule import ReleaseWindows, load_changes
+
+
+def synthetic_changes(days=28, locations=5, seed=0):
+    """weekday morning batches and an evening batch, plus random noise"""
+    rng = random.Random(seed)
+    start = datetime(2021, 5, 3)
+    changes = defaultdict(list)
+    for location_id in range(locations):
+        morning = rng.randint(7 * 60, 10 * 60)
+        for day in range(days):
+            date = start + timedelta(days=day)
+            jitter = timedelta(seconds=rng.randint(-300, 300))
+            if date.weekday() < 5:
+                changes[location_id].append(
+                    (date + timedelta(minutes=morning) + jitter).timestamp()
+                )
+            changes[location_id].append(
+                (date + timedelta(hours=17, minutes=30) - jitter).timestamp()
+            )
+            if rng.random() < 0.3:
+                changes[location_id].append(
+                    (date + timedelta(seconds=rng.randint(0, 86399))).timestamp()
+                )
+    return changes
+
+
+def replay(events, start, end, interval, windows=None, location_id=None):
+    """poll from start to end, returning (number of queries, detection latencies)"""
+    events = sorted(events)
+    latencies = []
+    queries = 0
+    i = 0
+    t = start
+    while t < end:
+        queries += 1
+        while i < len(events) and events[i] <= t:
+            latencies.append(t - events[i])
+            if windows:
+                windows.record(location_id, t)
+            i += 1
+        t += windows.interval(location_id, t) if windows else interval
+    return queries, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("log", nargs="?", help="ndjson output log to replay")
+    parser.add_argument("--sleep", type=int, default=300)
+    parser.add_argument("--burst", type=int, default=30)
+    args = parser.parse_args()
+
+    changes = load_changes(args.log) if args.log else synthetic_changes()
+    all_events = [t for events in changes.values() for t in events]
+    start, end = min(all_events), max(all_events) + args.sleep
+
+    strategies = {
+        f"uniform {args.sleep}s": lambda loc, events: replay(
+            events, start, end, args.sleep
+        ),
+        f"uniform {args.burst}s": lambda loc, events: replay(
+            events, start, end, args.burst
+        ),
+        "learned windows": lambda loc, events: replay(
+            events,
+            start,
+            end,
+            args.sleep,
+            ReleaseWindows(burst=args.burst, sparse=args.sleep),
+            loc,
+        ),
+    }
+    print(f"{len(changes)} locations, {len(all_events)} changes")
+    print(f"  {'strategy':18} {'queries':>9} {'mean lat':>9} {'median lat':>11}")
+    for name, strategy in strategies.items():
+        queries = 0
+        latencies = []
+        for loc, events in changes.items():
+            q, lat = strategy(loc, events)
+            queries += q
+            latencies.extend(lat)
+        print(
+            f"  {name:18} {queries:9d} {mean(latencies):8.1f}s {median(latencies):10.1f}s"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -28,6 +28,7 @@ setup(
     long_description_content_type="text/markdown",
     version="1.0",
     install_requires=requirements,
+    extras_require={"stats": ["numpy"]},
     author="Zachary Smithson",
     author_email="zrsmithson@gmail.com",
     url="https://github.com/zrsmithson/alvacc",
@@ -0,0 +1,88 @@
+import pickle
+import threading
+import unittest
+from datetime import datetime
+
+from alvacc.locations import Availability, next_avail, current_version
+
+
+def _avail(day, writer=0):
+    # num_available repeats the day so a torn read would show a mismatch
+    return next_avail.from_fields(f"June {day}, {writer}", datetime(2021, 6, day), day)
+
+
+class AvailabilityTest(unittest.TestCase):
+    def test_change_is_new_and_versioned(self):
+        a = Availability()
+        self.assertFalse(a.is_new)
+        a.current = _avail(14)
+        first = a.snapshot
+        self.assertTrue(first.is_new)
+        self.assertTrue(a.changed_since(0))
+        # same date only clears is_new, keeping the original reply
+        a.current = _avail(14, writer=1)
+        second = a.snapshot
+        self.assertFalse(second.is_new)
+        self.assertIs(second.current, first.current)
+        self.assertGreater(second.version, first.version)
+        # nothing left to publish
+        a.current = _avail(14)
+        self.assertIs(a.snapshot, second)
+        self.assertFalse(a.changed_since(second.version))
+        self.assertGreaterEqual(current_version(), second.version)
+
+    def test_pickles_without_lock(self):
+        a = Availability(_avail(3))
+        b = pickle.loads(pickle.dumps(a))
+        self.assertEqual(b.current.date, a.current.date)
+        b.current = _avail(4)
+        self.assertTrue(b.is_new)
+
+    def test_concurrent_writers_and_readers(self):
+        a = Availability()
+        writers, readers, updates = 8, 8, 3000
+        stop = threading.Event()
+        errors = []
+        seen = [dict() for _ in range(readers)]
+
+        def write(writer):
+            for i in range(updates):
+                a.current = _avail(1 + (i * 7 + writer) % 5, writer)
+
+        def read(index):
+            last = -1
+            while not stop.is_set():
+                snapshot = a.snapshot
+                if snapshot.version < last:
+                    errors.append(f"version {snapshot.version} after {last}")
+                last = snapshot.version
+                current = snapshot.current
+                if current and current.num_available != current.date.day:
+                    errors.append(f"torn reply {current!r}")
+                # keep the reply alive so object identity can be compared later
+                seen[index][snapshot.version] = (current, snapshot.is_new)
+
+        threads = [threading.Thread(target=read, args=(i,)) for i in range(readers)]
+        threads += [threading.Thread(target=write, args=(i,)) for i in range(writers)]
+        for t in threads:
+            t.start()
+        for t in threads[readers:]:
+            t.join()
+        stop.set()
+        for t in threads[:readers]:
+            t.join()
+
+        self.assertEqual(errors, [])
+        # every reader saw the same current and is_new for a given version
+        by_version = {}
+        for reader in seen:
+            for version, (current, is_new) in reader.items():
+                other = by_version.setdefault(version, (current, is_new))
+                self.assertIs(other[0], current)
+                self.assertEqual(other[1], is_new)
+        self.assertTrue(a.snapshot.current)
+        self.assertLessEqual(a.version, current_version())
+
+
+if __name__ == "__main__":
+    unittest.main()
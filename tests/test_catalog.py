@@ -0,0 +1,122 @@
+import os
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from alvacc import locations, get_locations
+from alvacc.catalog import Catalog
+
+_entries = [
+    {
+        "name": "Heflin",
+        "full_name": "Heflin Health Department",
+        "city": "Heflin",
+        "zip_code": "36264",
+        "location_id": 901,
+    },
+    {
+        "name": "Standin",
+        "full_name": "Stand-in County Health Department",
+        "city": "Nowhere",
+        "zip_code": "00000",
+        "location_id": 902,
+    },
+]
+
+
+class StandIn:
+    """local location listing endpoint with ETag support"""
+
+    def __init__(self):
+        self.requests = []
+        body = json.dumps(_entries).encode("utf-8")
+        requests = self.requests
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                requests.append(self.headers.get("If-None-Match"))
+                if self.headers.get("If-None-Match") == '"v1"':
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", '"v1"')
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        self.url = "http://%s:%d/" % self._httpd.server_address
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+class CatalogTest(unittest.TestCase):
+    def setUp(self):
+        self.heflin = {f: getattr(locations.Heflin, f) for f in _entries[0]}
+        self.all_locations = list(locations.all_locations)
+        self.tmp = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.tmp, "locations.json")
+        self.stand_in = StandIn()
+
+    def tearDown(self):
+        self.stand_in.close()
+        shutil.rmtree(self.tmp)
+        for field, value in self.heflin.items():
+            setattr(locations.Heflin, field, value)
+        locations.all_locations[:] = self.all_locations
+        if hasattr(locations, "Standin"):
+            delattr(locations, "Standin")
+
+    def catalog(self):
+        return Catalog(self.stand_in.url, self.cache_path, ttl=0)
+
+    def test_refresh_updates_and_adds_locations(self):
+        heflin = locations.Heflin
+        changed = self.catalog().refresh()
+        self.assertEqual(sorted(changed), ["Heflin", "Standin"])
+        # existing objects are updated in place
+        self.assertIs(locations.Heflin, heflin)
+        self.assertEqual(heflin.location_id, 901)
+        self.assertEqual(get_locations(["standin"])[0].location_id, 902)
+        self.assertIn("Standin", get_locations())
+
+    def test_unchanged_list_is_not_refetched(self):
+        self.catalog().refresh()
+        catalog = self.catalog().load()
+        self.assertEqual(catalog.refresh(), [])
+        self.assertEqual(self.stand_in.requests, [None, '"v1"'])
+
+    def test_background_refresh_only_updates_cache(self):
+        self.catalog().refresh_in_background().join()
+        self.assertNotEqual(locations.Heflin.location_id, 901)
+        self.assertFalse(hasattr(locations, "Standin"))
+        # applied on the next start
+        self.catalog().load()
+        self.assertEqual(locations.Heflin.location_id, 901)
+
+    def test_invalid_list_changes_nothing(self):
+        entries = [_entries[0], {"name": "Standin"}]
+        with self.assertRaises(ValueError):
+            Catalog.apply(entries)
+        self.assertNotEqual(locations.Heflin.location_id, 901)
+        self.assertFalse(hasattr(locations, "Standin"))
+
+    def test_fresh_cache_is_not_refreshed(self):
+        self.catalog().refresh()
+        catalog = Catalog(self.stand_in.url, self.cache_path, ttl=3600).load()
+        self.assertIsNone(catalog.refresh_in_background())
+        self.assertEqual(len(self.stand_in.requests), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+from datetime import datetime
+
+from alvacc import dates
+
+
+class DatesTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = dates.SimulatedClock(datetime(2026, 10, 19, 12).timestamp())
+        dates.set_clock(self.clock)
+
+    def tearDown(self):
+        dates.set_clock()
+
+    def test_past_months_wrap_to_next_year(self):
+        self.assertEqual(dates.parse_month_day("June 14"), datetime(2027, 6, 14))
+        self.assertEqual(dates.parse_month_day("October 2"), datetime(2026, 10, 2))
+        self.assertEqual(dates.parse_month_day("December 1"), datetime(2026, 12, 1))
+
+    def test_february_29_uses_next_leap_year(self):
+        self.assertEqual(dates.parse_month_day("February 29"), datetime(2028, 2, 29))
+
+    def test_reference_follows_clock_across_days(self):
+        self.clock.sleep(90 * 86400)
+        self.assertEqual(dates.today(), datetime(2027, 1, 17))
+        self.assertEqual(dates.parse_month_day("June 14"), datetime(2027, 6, 14))
+
+    def test_unparseable(self):
+        with self.assertRaises(ValueError):
+            dates.parse_month_day("No availability")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import threading
+import unittest
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from alvacc import dates, locations
+from alvacc.query import ResponseCache
+
+
+def run_now(fn, *args):
+    """submit that runs the callable before returning"""
+    future = Future()
+    try:
+        future.set_result(fn(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+class ResponseCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = dates.SimulatedClock(1000)
+        dates.set_clock(self.clock)
+        self.calls = []
+
+    def tearDown(self):
+        dates.set_clock()
+
+    def check(self, loc):
+        self.calls.append(loc.name)
+        return f"{loc.name} {len(self.calls)}"
+
+    def test_cached_until_too_old(self):
+        cache = ResponseCache()
+
+        def fetch():
+            return cache.fetch(locations.Heflin, 60, run_now, self.check).result()
+
+        self.assertEqual(fetch(), "Heflin 1")
+        self.clock.sleep(60)
+        self.assertEqual(fetch(), "Heflin 1")
+        self.clock.sleep(1)
+        self.assertEqual(fetch(), "Heflin 2")
+        self.assertEqual(self.calls, ["Heflin", "Heflin"])
+
+    def test_least_recently_used_is_dropped(self):
+        cache = ResponseCache(maxsize=2)
+        for loc in (locations.Heflin, locations.Walker, locations.Heflin):
+            cache.fetch(loc, 60, run_now, self.check).result()
+        cache.fetch(locations.Baldwin, 60, run_now, self.check).result()
+        self.assertEqual(len(cache), 2)
+        self.assertIsNotNone(cache.get(locations.Heflin.location_id, 60))
+        self.assertIsNone(cache.get(locations.Walker.location_id, 60))
+
+    def test_concurrent_fetches_share_one_query(self):
+        cache = ResponseCache()
+        started, release = threading.Event(), threading.Event()
+
+        def check(loc):
+            started.set()
+            release.wait(5)
+            return self.check(loc)
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            first = cache.fetch(locations.Heflin, 60, executor.submit, check)
+            started.wait(5)
+            others = [
+                cache.fetch(locations.Heflin, 60, executor.submit, check)
+                for _ in range(3)
+            ]
+            release.set()
+            results = [f.result(5) for f in [first, *others]]
+        self.assertEqual(results, ["Heflin 1"] * 4)
+        self.assertEqual(self.calls, ["Heflin"])
+
+    def test_failed_query_is_not_cached(self):
+        cache = ResponseCache()
+
+        def check(loc):
+            self.calls.append(loc.name)
+            raise OSError("down")
+
+        with self.assertRaises(OSError):
+            cache.fetch(locations.Heflin, 60, run_now, check).result()
+        self.assertEqual(
+            cache.fetch(locations.Heflin, 60, run_now, self.check).result(),
+            "Heflin 2",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()